@@ -1,3 +1,5 @@
+import asyncio
+import logging
 import uuid
 from dotenv import load_dotenv
 from livekit import agents
@@ -13,154 +15,116 @@ import tools1  # our onboarding tools
 
 load_dotenv()
 
+logger = logging.getLogger("onboarding")
+
 class Assistant(Agent):
     def __init__(self, session_id: str) -> None:
         self.session_id = session_id
-        
-        # Set the current session ID for tools to use
-        tools1.set_current_session_id(session_id)
-        
+
         super().__init__(
             instructions=AGENT_INSTRUCTION,
             stt=openai.STT(model="gpt-4o-transcribe"),
             llm=openai.LLM(model="gpt-4o-mini"),
+            # Tools bound to this session, so no shared session state is
+            # looked up on each call
             tools=[
-                tools1.validate_field,
-                tools1.store_field,
-                tools1.save_current_session,
-                tools1.log_message,
-                tools1.log_conversation_turn,
-                tools1.force_save_session,
-                tools1.get_conversation_history,
-                tools1.is_onboarding_complete,
-                tools1.get_summary,
-                tools1.get_current_state,
-                tools1.reset_current_session,
-                tools1.load_session,
+                tools1.make_validate_field(session_id),
+                tools1.make_store_field(session_id),
+                tools1.make_is_onboarding_complete(session_id),
+                tools1.make_get_summary(session_id),
             ],
             tts=openai.TTS(model="gpt-4o-mini-tts", voice="ash"),
             vad=silero.VAD.load(),
             turn_detection=MultilingualModel()
         )
 
-    async def on_message(self, message, participant, is_final):
-        """
-        Intercepts all messages in the conversation for logging.
-        """
-        if not is_final or not message.strip():
-            return  # only log final, non-empty messages
-
-        try:
-            # More robust participant detection
-            # In LiveKit, the agent itself is usually identified by participant.identity
-            participant_identity = getattr(participant, 'identity', '')
-            participant_name = getattr(participant, 'name', '')
-            
-            print(f"🔍 [{self.session_id}] Message from participant - Identity: '{participant_identity}', Name: '{participant_name}', is_local: {participant.is_local}")
-            
-            # Determine speaker based on multiple criteria
-            if participant.is_local or 'agent' in participant_identity.lower() or 'assistant' in participant_identity.lower():
-                speaker = "assistant"
-                print(f"🤖 [{self.session_id}] ASSISTANT MESSAGE: '{message}'")
-            else:
-                speaker = "user"
-                print(f"👤 [{self.session_id}] USER MESSAGE: '{message}'")
-
-            # Log the message with session ID
-            result = await tools1.log_message_with_session(self.session_id, speaker, message)
-            print(f"📝 [{self.session_id}] Log result: {result}")
-            
-            # Save session after logging message
-            save_result = await tools1.save_session(self.session_id)
-            print(f"💾 [{self.session_id}] Session save result: {save_result}")
-                
-        except Exception as e:
-            print(f"❌ [{self.session_id}] Error in on_message: {e}")
-            import traceback
-            traceback.print_exc()
-
-    async def on_participant_speech_end(self, participant, text: str):
+    async def log_and_save(self, speaker: str, text: str):
         """
-        Called when any participant finishes speaking.
+        Log a message and save the session. Both only queue work for the
+        background writer, so they run back to back without extra tasks.
+        Returns the (log result, save result) pair.
         """
-        try:
-            participant_identity = getattr(participant, 'identity', '')
-            participant_name = getattr(participant, 'name', '')
-            
-            print(f"🗣️ [{self.session_id}] Speech ended - Participant: '{participant_identity}', Text: '{text}'")
-            
-            # Determine speaker
-            if participant.is_local or 'agent' in participant_identity.lower():
-                speaker = "assistant"
-            else:
-                speaker = "user"
-                
-            # Log the speech
-            result = await tools1.log_message_with_session(self.session_id, speaker, text)
-            print(f"📝 [{self.session_id}] Speech log result: {result}")
-            
-            # Save session after logging
-            save_result = await tools1.save_session(self.session_id)
-            print(f"💾 [{self.session_id}] Session save after speech: {save_result}")
-            
-        except Exception as e:
-            print(f"❌ [{self.session_id}] Error in on_participant_speech_end: {e}")
-            import traceback
-            traceback.print_exc()
+        log_result = await tools1.log_message_with_session(self.session_id, speaker, text)
+        save_result = await tools1.save_session(self.session_id)
+        return log_result, save_result
 
     async def on_agent_speech_end(self, text: str):
         """
-        Called when the agent finishes speaking.
+        Called from entrypoint's conversation_item_added handler when an assistant
+        message is added to the chat context.
         """
         try:
-            print(f"🗣️ [{self.session_id}] Agent speech ended: '{text}'")
-            # Log assistant message
-            result = await tools1.log_message_with_session(self.session_id, "assistant", text)
-            print(f"📝 [{self.session_id}] Agent speech log result: {result}")
-            
-            # Save session after logging
-            save_result = await tools1.save_session(self.session_id)
-            print(f"💾 [{self.session_id}] Session save after agent speech: {save_result}")
+            logger.debug("🗣️ [%s] Agent speech ended: '%s'", self.session_id, text)
+            # Log assistant message and save the session
+            result, save_result = await self.log_and_save("assistant", text)
+            logger.debug("📝 [%s] Agent speech log result: %s", self.session_id, result)
+            logger.debug("💾 [%s] Session save after agent speech: %s", self.session_id, save_result)
             
         except Exception as e:
-            print(f"❌ [{self.session_id}] Error in on_agent_speech_end: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("❌ [%s] Error in on_agent_speech_end: %s", self.session_id, e)
 
     async def on_user_speech_end(self, text: str):
         """
-        Called when user finishes speaking.
+        Called from entrypoint's conversation_item_added handler when a user
+        message is added to the chat context.
         """
         try:
-            print(f"🗣️ [{self.session_id}] User speech ended: '{text}'")
-            # Log user message
-            result = await tools1.log_message_with_session(self.session_id, "user", text)
-            print(f"📝 [{self.session_id}] User speech log result: {result}")
-            
-            # Save session after logging
-            save_result = await tools1.save_session(self.session_id)
-            print(f"💾 [{self.session_id}] Session save after user speech: {save_result}")
+            logger.debug("🗣️ [%s] User speech ended: '%s'", self.session_id, text)
+            # Log user message and save the session
+            result, save_result = await self.log_and_save("user", text)
+            logger.debug("📝 [%s] User speech log result: %s", self.session_id, result)
+            logger.debug("💾 [%s] Session save after user speech: %s", self.session_id, save_result)
             
         except Exception as e:
-            print(f"❌ [{self.session_id}] Error in on_user_speech_end: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("❌ [%s] Error in on_user_speech_end: %s", self.session_id, e)
 
 
 async def entrypoint(ctx: agents.JobContext):
     # Create unique session ID for this onboarding call
     session_id = str(uuid.uuid4())
-    print(f"🚀 Starting new session with ID: {session_id}")
+    logger.info("🚀 Starting new session with ID: %s", session_id)
     
     # Reset session state
     reset_result = await tools1.reset_session(session_id)
-    print(f"🔄 Session reset: {reset_result}")
+    logger.info("🔄 Session reset: %s", reset_result)
+
+    # Host-side logging tasks still running, see on_conversation_item_added
+    log_tasks = set()
+
+    async def flush_session_on_shutdown():
+        # Let pending log tasks queue their messages, then wait for the
+        # background writer to persist the final state
+        if log_tasks:
+            await asyncio.gather(*log_tasks, return_exceptions=True)
+        await tools1.flush_session(session_id)
+
+    ctx.add_shutdown_callback(flush_session_on_shutdown)
 
     session = AgentSession()
 
     # Create assistant instance
     assistant = Assistant(session_id=session_id)
 
+    # Conversation logging is done here on the host, not by the LLM. Every
+    # final user transcript and assistant reply is added to the chat context,
+    # which fires conversation_item_added. The item's role already says who
+    # spoke, so no participant identity has to be inspected per message.
+
+    @session.on("conversation_item_added")
+    def on_conversation_item_added(event):
+        item = event.item
+        if getattr(item, "type", None) != "message" or not item.text_content:
+            return
+        if item.role == "user":
+            task = asyncio.create_task(assistant.on_user_speech_end(item.text_content))
+        elif item.role == "assistant":
+            task = asyncio.create_task(assistant.on_agent_speech_end(item.text_content))
+        else:
+            return
+        # Keep a reference until the task finishes so it is not garbage collected
+        log_tasks.add(task)
+        task.add_done_callback(log_tasks.discard)
+
     await session.start(
         room=ctx.room,
         agent=assistant,
@@ -173,17 +137,15 @@ async def entrypoint(ctx: agents.JobContext):
     # Initial onboarding intro
     try:
         initial_message = "Starting onboarding session..."
-        log_result = await tools1.log_message_with_session(session_id, "assistant", initial_message)
-        save_result = await tools1.save_session(session_id)
-        print(f"📝 Initial log: {log_result}")
-        print(f"💾 Initial save: {save_result}")
+        log_result, save_result = await assistant.log_and_save("assistant", initial_message)
+        logger.debug("📝 Initial log: %s", log_result)
+        logger.debug("💾 Initial save: %s", save_result)
     except Exception as e:
-        print(f"❌ Error logging initial message: {e}")
+        logger.error("❌ Error logging initial message: %s", e)
 
-    # Generate initial reply with session instructions
-    await session.generate_reply(
-        instructions=f"{SESSION_INSTRUCTION}\n\nSession ID: {session_id}"
-    )
+    # The greeting is a fixed script, so speak it as is rather than have the
+    # LLM generate it on every call
+    session.say(SESSION_INSTRUCTION.strip())
 
 
 if __name__ == "__main__":
@@ -1,42 +1,80 @@
-import json
+import asyncio
+import itertools
+import logging
 import os
-from typing import Optional, List, Annotated, Dict
-from pydantic import BaseModel, EmailStr, field_validator, Field
+import re
+import time
+from collections import deque
+from datetime import datetime
+from typing import Optional, List, Annotated, Dict, IO, Iterable, Iterator, Tuple
+from pydantic import BaseModel, EmailStr, Field, TypeAdapter, ValidationError, AfterValidator
+import orjson
 import pycountry
 from livekit.agents import function_tool
 
+logger = logging.getLogger("onboarding")
+
 # -------------------
 #  Pydantic Validation Model
 # -------------------
 
+# Lower-cased country names accepted by validation, built once at import
+_COUNTRY_NAMES = frozenset(
+    name.lower()
+    for c in pycountry.countries
+    for name in (c.name, getattr(c, "official_name", None), getattr(c, "common_name", None))
+    if name
+)
+
+# International phone number format (E.164), compiled once at import
+_PHONE_RE = re.compile(r"^\+?[1-9]\d{1,14}$")
+
+def _check_phone(v: str) -> str:
+    if not _PHONE_RE.fullmatch(v):
+        raise ValueError("Phone number must be in international format, e.g. +1234567890")
+    return v
+
+def _check_country(v: str) -> str:
+    if v.lower() not in _COUNTRY_NAMES:
+        raise ValueError("Invalid country name")
+    return v
+
+# Field types shared by the model and the per-field validators below
+NameStr = Annotated[str, Field(
+    strip_whitespace=True,
+    min_length=2,
+    max_length=100
+)]
+
+PhoneStr = Annotated[str, Field(strip_whitespace=True), AfterValidator(_check_phone)]
+
+CountryStr = Annotated[str, AfterValidator(_check_country)]
+
 class UserOnboarding(BaseModel):
     """
     Pydantic model to validate onboarding form fields.
     """
-    name: Optional[Annotated[str, Field(
-        strip_whitespace=True,
-        min_length=2,
-        max_length=100
-    )]] = None
+    name: Optional[NameStr] = None
 
     email: Optional[EmailStr] = None
 
-    phone: Optional[Annotated[str, Field(
-        strip_whitespace=True,
-        pattern=r"^\+?[1-9]\d{1,14}$"
-    )]] = None
+    phone: Optional[PhoneStr] = None
+
+    country: Optional[CountryStr] = None
 
-    country: Optional[str] = None
 
-    @field_validator("country")
-    @classmethod
-    def validate_country(cls, v):
-        if v is None:
-            return v
-        countries = {c.name.lower() for c in pycountry.countries}
-        if v.lower() not in countries:
-            raise ValueError("Invalid country name")
-        return v
+# Validators for a single field, so checking one value does not re-run the
+# validators of every field already collected
+_FIELD_ADAPTERS: Dict[str, TypeAdapter] = {
+    "name": TypeAdapter(NameStr),
+    "email": TypeAdapter(EmailStr),
+    "phone": TypeAdapter(PhoneStr),
+    "country": TypeAdapter(CountryStr),
+}
+
+def _format_validation_error(e: ValidationError) -> str:
+    """Join the messages of a ValidationError into one readable line"""
+    return "; ".join(error["msg"] for error in e.errors())
 
 
 # -------------------
@@ -46,28 +84,99 @@ class UserOnboarding(BaseModel):
 # Dictionary to hold session-specific data
 sessions_data: Dict[str, Dict] = {}
 
+# One bit per onboarding field, tracking which ones have been filled
+FIELD_BITS: Dict[str, int] = {"name": 1, "email": 2, "phone": 4, "country": 8}
+ALL_FIELDS_FILLED = 0xF
+
+def _filled_mask(onboarding_state: Dict[str, Optional[str]]) -> int:
+    """Compute the filled-field bitmask for an onboarding state"""
+    return sum(bit for field, bit in FIELD_BITS.items() if onboarding_state.get(field))
+
+# A conversation log entry: (speaker, text, epoch timestamp)
+LogEntry = Tuple[str, str, Optional[float]]
+
+# Number of recent messages kept in memory. The JSONL log file holds the
+# full conversation.
+LOG_WINDOW = 20
+
+def _new_conversation_log() -> Dict[str, deque]:
+    """
+    Build an empty in-memory conversation log. Entries are stored
+    column-wise, one bounded deque per attribute, which is far more compact
+    than a dict per message and keeps only the last LOG_WINDOW entries.
+    """
+    return {
+        "speaker": deque(maxlen=LOG_WINDOW),
+        "text": deque(maxlen=LOG_WINDOW),
+        "ts": deque(maxlen=LOG_WINDOW)
+    }
+
+def _append_to_log(conversation_log: Dict[str, deque], entry: LogEntry) -> None:
+    """Append one entry to a columnar conversation log"""
+    speaker, text, ts = entry
+    conversation_log["speaker"].append(speaker)
+    conversation_log["text"].append(text)
+    conversation_log["ts"].append(ts)
+
+def _iter_log(conversation_log: Dict[str, deque]) -> Iterator[LogEntry]:
+    """Iterate a columnar conversation log as entries"""
+    return zip(conversation_log["speaker"], conversation_log["text"], conversation_log["ts"])
+
+def _new_session_data(session_id: str) -> Dict:
+    """Build an empty session data record"""
+    return {
+        "onboarding_state": {
+            "name": None,
+            "email": None,
+            "phone": None,
+            "country": None
+        },
+        "conversation_log": _new_conversation_log(),
+        # Messages logged over the whole session, not just those in memory
+        "_log_total": 0,
+        "_filled": 0,
+        "_pending_log": [],
+        # Bumped on every onboarding state change / recorded on every save
+        "_dirty_seq": 0,
+        "_saved_seq": 0,
+        # File paths, built once per session rather than on every write
+        "_meta_path": _get_session_file(session_id),
+        "_log_path": _get_log_file(session_id)
+    }
+
 def _get_session_data(session_id: str) -> Dict:
-    """Get or create session data for the given session_id"""
+    """
+    Get or create session data for the given session_id, for paths that
+    write to it. Raises RuntimeError once the session has been flushed and
+    closed.
+    """
+    if session_id in _closed_sessions:
+        raise RuntimeError(f"Session {session_id} is closed")
     if session_id not in sessions_data:
-        sessions_data[session_id] = {
-            "onboarding_state": {
-                "name": None,
-                "email": None,
-                "phone": None,
-                "country": None
-            },
-            "conversation_log": []
-        }
+        sessions_data[session_id] = _new_session_data(session_id)
+    _ensure_writer(session_id)
     return sessions_data[session_id]
 
+def _peek_session_data(session_id: str) -> Optional[Dict]:
+    """
+    Get session data for read-only paths. Returns None for an unknown or
+    closed session instead of creating one and starting its writer.
+    """
+    return sessions_data.get(session_id)
+
+def _mark_dirty(session_id: str) -> None:
+    """Record that the session's onboarding state changed since the last save"""
+    _get_session_data(session_id)["_dirty_seq"] += 1
+
+def get_filled_mask(session_id: str) -> int:
+    """Get the FIELD_BITS bitmask of onboarding fields filled so far"""
+    session_data = _peek_session_data(session_id)
+    return session_data["_filled"] if session_data else 0
+
 def _get_onboarding_state(session_id: str) -> Dict[str, Optional[str]]:
     """Get onboarding state for specific session"""
     return _get_session_data(session_id)["onboarding_state"]
 
-def _get_conversation_log(session_id: str) -> List[Dict[str, str]]:
-    """Get conversation log for specific session"""
-    return _get_session_data(session_id)["conversation_log"]
-
 
 # -------------------
 #  File Helpers
@@ -75,41 +184,384 @@ def _get_conversation_log(session_id: str) -> List[Dict[str, str]]:
 
 def _get_session_file(session_id: str) -> str:
     """
-    Build the file path for a given session's JSON file.
+    Build the file path for a given session's metadata JSON file.
+    """
+    return f"session_{session_id}.meta.json"
+
+def _get_log_file(session_id: str) -> str:
+    """
+    Build the file path for a given session's append-only conversation log.
+    """
+    return f"session_{session_id}.log.jsonl"
+
+def _get_legacy_session_file(session_id: str) -> str:
+    """
+    Build the file path used by the older single-file session format.
     """
     return f"session_{session_id}.json"
 
-@function_tool()
-async def save_session(session_id: str) -> str:
+def _write_json(fh: IO[bytes], data: Dict) -> None:
+    """
+    Overwrite a session's open metadata file with a snapshot.
+    Runs in a worker thread.
     """
-    Save the current onboarding state and conversation log to a JSON file.
+    fh.seek(0)
+    fh.truncate()
+    fh.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+    fh.flush()
 
-    Args:
-        session_id: Unique identifier for the session.
+def _format_timestamp(ts: Optional[float]) -> str:
+    """Render a log entry's epoch timestamp as a readable string"""
+    return datetime.fromtimestamp(ts).isoformat(sep=" ") if ts is not None else ""
+
+def _parse_timestamp(value: Optional[str]) -> Optional[float]:
+    """Parse a timestamp string written by _format_timestamp back to epoch seconds"""
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+def _export_log_entry(entry: LogEntry) -> Dict[str, str]:
+    """
+    Convert an in-memory log entry to its on-disk form. Timestamps are kept
+    as floats in memory and only formatted here, when they are written out.
+    """
+    speaker, text, ts = entry
+    return {
+        "speaker": speaker,
+        "text": text,
+        "timestamp": _format_timestamp(ts)
+    }
+
+def _import_log_entry(data: Dict[str, str]) -> LogEntry:
+    """Convert an on-disk log entry back to its in-memory form"""
+    return (
+        data.get("speaker", "unknown"),
+        data.get("text", ""),
+        _parse_timestamp(data.get("timestamp"))
+    )
+
+def _load_log(entries: Iterable[LogEntry]) -> Tuple[Dict[str, deque], int]:
+    """
+    Build the in-memory conversation log from a stream of entries.
 
     Returns:
-        Confirmation message as string.
+        (conversation_log, total number of entries seen).
+    """
+    conversation_log = _new_conversation_log()
+    total = 0
+    for entry in entries:
+        _append_to_log(conversation_log, entry)
+        total += 1
+    return conversation_log, total
+
+def _stream_log_file(path: str) -> Iterator[LogEntry]:
+    """Lazily read the entries of a conversation log file, if it exists"""
+    if not os.path.exists(path):
+        return
+    with open(path, "rb") as f:
+        for line in f:
+            if line.strip():
+                yield _import_log_entry(orjson.loads(line))
+
+def _write_jsonl(path: str, entries: Iterable[LogEntry]) -> None:
+    """
+    Rewrite a conversation log file from a list of entries. Runs in a worker thread.
+    """
+    with open(path, "wb") as f:
+        for entry in entries:
+            f.write(orjson.dumps(_export_log_entry(entry)) + b"\n")
+
+def _format_history(entries: Iterable[LogEntry], start: int = 1) -> str:
+    """Render log entries as numbered history lines"""
+    return "\n".join(
+        f"{i}. [{speaker}] {text} (at {_format_timestamp(ts)})"
+        for i, (speaker, text, ts) in enumerate(entries, start)
+    )
+
+def _read_session_files(session_id: str) -> Optional[tuple]:
+    """
+    Read a session's onboarding data and recent conversation from disk.
+    A legacy single-file session has its conversation moved to the JSONL
+    log on the way. The metadata file is overwritten in place, so a crash
+    mid-save can leave it empty or partial; its onboarding data is then
+    dropped and the conversation is still read from the log. Runs in a
+    worker thread.
+
+    Returns:
+        (onboarding_data, conversation, total_messages, is_legacy),
+        or None if no file exists.
+    """
+    meta_path = _get_session_file(session_id)
+    log_path = _get_log_file(session_id)
+    if os.path.exists(meta_path):
+        with open(meta_path, "rb") as f:
+            try:
+                data = orjson.loads(f.read())
+            except orjson.JSONDecodeError as e:
+                logger.warning("⚠️ Session %s metadata unreadable, loading conversation only: %s", session_id, e)
+                data = {}
+        conversation, total = _load_log(_stream_log_file(log_path))
+        return data.get("onboarding_data", {}), conversation, total, False
+
+    legacy_path = _get_legacy_session_file(session_id)
+    if os.path.exists(legacy_path):
+        with open(legacy_path, "rb") as f:
+            data = orjson.loads(f.read())
+        entries = [_import_log_entry(entry) for entry in data.get("conversation", [])]
+        _write_jsonl(log_path, entries)
+        conversation, total = _load_log(entries)
+        return data.get("onboarding_data", {}), conversation, total, True
+
+    return None
+
+
+# -------------------
+#  Open Session Files
+# -------------------
+
+# Each session keeps its metadata and log files open for its whole lifetime
+# instead of reopening them on every write. They are fsynced and closed
+# when the session is flushed at shutdown.
+
+def _get_meta_handle(session_data: Dict) -> IO[bytes]:
+    """Get the session's open metadata file, opening it on first use"""
+    fh = session_data.get("_metafh")
+    if fh is None:
+        fh = session_data["_metafh"] = open(session_data["_meta_path"], "wb")
+    return fh
+
+def _get_log_handle(session_data: Dict) -> IO[bytes]:
+    """
+    Get the session's open conversation log file, opening it on first use
+    or again after a failed append closed it
+    """
+    fh = session_data.get("_logfh")
+    if fh is None or fh.closed:
+        fh = session_data["_logfh"] = open(session_data["_log_path"], "ab")
+    return fh
+
+def _close_files(session_data: Dict) -> None:
+    """
+    Fsync and close the files held by a session record, if any.
+    Runs in a worker thread.
+    """
+    for key in ("_metafh", "_logfh"):
+        fh = session_data.pop(key, None)
+        if fh is not None and not fh.closed:
+            fh.flush()
+            os.fsync(fh.fileno())
+            fh.close()
+
+def _append_jsonl(fh: IO[bytes], entries: List[LogEntry]) -> None:
+    """
+    Serialize and append a batch of log entries, then flush them.
+    If the write fails, the handle is closed and the file cut back to where
+    the batch started, so a retry does not leave a broken line followed by
+    the same entries again. Runs in a worker thread.
+    """
+    pos = fh.tell()
+    try:
+        fh.write(b"".join(orjson.dumps(_export_log_entry(entry)) + b"\n" for entry in entries))
+        fh.flush()
+    except Exception:
+        # Closing discards the part of the batch still in the write buffer
+        try:
+            fh.close()
+        except OSError:
+            pass
+        os.truncate(fh.name, pos)
+        raise
+
+def _queue_log_entry(session_id: str, entry: LogEntry) -> None:
+    """
+    Queue a conversation entry that was just added to the in-memory log for
+    the background writer. Only new lines are written, never the whole log.
     """
     session_data = _get_session_data(session_id)
-    data = {
+    session_data["_pending_log"].append(entry)
+    _dirty_events[session_id].set()
+
+
+# -------------------
+#  Background Session Writer
+# -------------------
+
+# Pending log entries and metadata saves are flushed together, at most once
+# per FLUSH_INTERVAL seconds, or sooner once FLUSH_MAX_EVENTS have piled up.
+FLUSH_INTERVAL = 0.25
+FLUSH_MAX_EVENTS = 16
+
+# A failed flush is retried after FLUSH_INTERVAL, doubling on each further
+# failure up to FLUSH_MAX_BACKOFF seconds.
+FLUSH_MAX_BACKOFF = 8.0
+
+# Per-session "has pending writes" events and their writer tasks, and the
+# sessions flush_session has closed. A closed session keeps only its ID
+# here, not its data, and accepts no more writes until it is reset or
+# loaded again. Only the last MAX_CLOSED_SESSIONS IDs are remembered (in
+# closing order), which covers any late write from a call that just ended.
+MAX_CLOSED_SESSIONS = 1024
+_dirty_events: Dict[str, asyncio.Event] = {}
+_writer_tasks: Dict[str, asyncio.Task] = {}
+_closed_sessions: Dict[str, None] = {}
+
+def _mark_closed(session_id: str) -> None:
+    """Remember a session as closed, forgetting the oldest closed ones"""
+    _closed_sessions.pop(session_id, None)
+    _closed_sessions[session_id] = None
+    while len(_closed_sessions) > MAX_CLOSED_SESSIONS:
+        del _closed_sessions[next(iter(_closed_sessions))]
+
+def _ensure_writer(session_id: str) -> asyncio.Event:
+    """Start the background writer for a session if it is not running yet"""
+    dirty = _dirty_events.get(session_id)
+    if dirty is None:
+        dirty = _dirty_events[session_id] = asyncio.Event()
+        _writer_tasks[session_id] = asyncio.create_task(_writer_loop(session_id, dirty))
+    return dirty
+
+def _pending_events(session_id: str) -> int:
+    """Count the writes waiting for the next flush"""
+    session_data = sessions_data.get(session_id)
+    if session_data is None:
+        return 0
+    return len(session_data["_pending_log"]) + (session_data["_dirty_seq"] != session_data["_saved_seq"])
+
+def _snapshot_session(session_id: str) -> Dict:
+    """
+    Copy the session state for serialization off the event loop.
+    Built without awaiting, so no handler can mutate it halfway through.
+    """
+    session_data = sessions_data.get(session_id) or _new_session_data(session_id)
+    return {
         "session_id": session_id,
-        "onboarding_data": session_data["onboarding_state"],
-        "conversation": session_data["conversation_log"]
+        "onboarding_data": dict(session_data["onboarding_state"])
     }
+
+async def _flush_pending(session_id: str) -> bool:
+    """
+    Write out the session's pending log entries and metadata. Entries stay
+    in _pending_log until they are written, so readers still see a batch
+    that is in flight and a failed batch can be retried.
+
+    Returns:
+        False if the write failed, True otherwise.
+    """
+    session_data = sessions_data.get(session_id)
+    if session_data is None:
+        return True
+    pending = session_data["_pending_log"]
+    entries = pending[:]
+    seq = session_data["_dirty_seq"]
+    snapshot = _snapshot_session(session_id) if seq != session_data["_saved_seq"] else None
+    if not entries and snapshot is None:
+        return True
     try:
-        with open(_get_session_file(session_id), "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
-        print(f"💾 Session {session_id} saved with {len(session_data['conversation_log'])} messages")
-        return f"Session {session_id} saved successfully"
+        if entries:
+            await asyncio.to_thread(_append_jsonl, _get_log_handle(session_data), entries)
+            # Entries logged during the write were appended after the batch
+            del pending[:len(entries)]
+        if snapshot is not None:
+            await asyncio.to_thread(_write_json, _get_meta_handle(session_data), snapshot)
+            session_data["_saved_seq"] = seq
+        logger.debug("💾 Session %s flushed %d messages%s", session_id, len(entries), " and metadata" if snapshot else "")
+        return True
     except Exception as e:
-        print(f"❌ Failed to save session {session_id}: {str(e)}")
-        return f"Failed to save session: {str(e)}"
+        logger.error("❌ Failed to save session %s: %s", session_id, e)
+        # The writer retries later. A closing session gets no more flushes.
+        if session_id in _closed_sessions:
+            logger.error("❌ Session %s closed with %d messages unsaved", session_id, len(pending))
+        return False
+
+async def _writer_loop(session_id: str, dirty: asyncio.Event) -> None:
+    """Flush the session's pending writes in batches until it is closed"""
+    loop = asyncio.get_running_loop()
+    failures = 0
+    while True:
+        await dirty.wait()
+        # Let more events join this batch until the interval runs out or
+        # the batch is full. Closing sessions are flushed right away.
+        deadline = loop.time() + FLUSH_INTERVAL
+        while session_id not in _closed_sessions and _pending_events(session_id) < FLUSH_MAX_EVENTS:
+            dirty.clear()
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                await asyncio.wait_for(dirty.wait(), timeout=remaining)
+            except asyncio.TimeoutError:
+                break
+        dirty.clear()
+        if await _flush_pending(session_id):
+            failures = 0
+        elif session_id not in _closed_sessions:
+            # Wait before retrying, so a lasting error such as a full disk
+            # does not spin the writer. New events do not cut the wait
+            # short, but closing the session does.
+            failures += 1
+            deadline = loop.time() + min(FLUSH_INTERVAL * 2 ** (failures - 1), FLUSH_MAX_BACKOFF)
+            while session_id not in _closed_sessions:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    await asyncio.wait_for(dirty.wait(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    break
+                dirty.clear()
+            dirty.set()
+        if session_id in _closed_sessions and not dirty.is_set():
+            return
+
+async def flush_session(session_id: str) -> None:
+    """
+    Write out any pending data, stop the session's background writer,
+    fsync and close its files and drop its in-memory data. Call once when
+    the session ends; later logs and saves for the session are refused.
+    """
+    _mark_closed(session_id)
+    task = _writer_tasks.get(session_id)
+    if task is not None:
+        _dirty_events[session_id].set()
+        try:
+            await task
+        finally:
+            _dirty_events.pop(session_id, None)
+            _writer_tasks.pop(session_id, None)
+    session_data = sessions_data.get(session_id)
+    if session_data is not None:
+        try:
+            await asyncio.to_thread(_close_files, session_data)
+        finally:
+            sessions_data.pop(session_id, None)
+
+
+async def save_session(session_id: str) -> str:
+    """
+    Save the current onboarding state to the session's metadata JSON file.
+    The write happens in the background and is batched with other pending
+    saves and conversation messages. Does nothing if the onboarding state
+    has not changed since the last save. Not exposed to the LLM; called by
+    the host after logging each message and by store_field.
+
+    Args:
+        session_id: Unique identifier for the session.
+
+    Returns:
+        Confirmation message as string.
+    """
+    session_data = _get_session_data(session_id)
+    if session_data["_dirty_seq"] == session_data["_saved_seq"]:
+        return f"Session {session_id} already up to date"
+    _dirty_events[session_id].set()
+    return f"Session {session_id} save scheduled"
 
 
-@function_tool()
 async def load_session(session_id: str) -> str:
     """
-    Load an existing session's data from its JSON file.
+    Load an existing session's data from its metadata and log files.
+    Not exposed to the LLM; a helper for restoring a session by hand.
 
     Args:
         session_id: Unique identifier for the session.
@@ -117,33 +569,43 @@ async def load_session(session_id: str) -> str:
     Returns:
         Confirmation message as string.
     """
-    file_path = _get_session_file(session_id)
     try:
-        if os.path.exists(file_path):
-            with open(file_path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                
-                # Load into session-specific storage
-                sessions_data[session_id] = {
-                    "onboarding_state": data.get("onboarding_data", {
-                        "name": None, "email": None, "phone": None, "country": None
-                    }),
-                    "conversation_log": data.get("conversation", [])
-                }
-            print(f"📂 Session {session_id} loaded with {len(sessions_data[session_id]['conversation_log'])} messages")
-            return f"Session {session_id} loaded successfully"
-        else:
-            print(f"📂 Session file for {session_id} not found, creating new session")
+        if session_id in sessions_data:
+            # Let the writer finish with the session's files before reading
+            # them back; this also closes them
+            await flush_session(session_id)
+        loaded = await asyncio.to_thread(_read_session_files, session_id)
+        _closed_sessions.pop(session_id, None)
+        if loaded is None:
+            logger.info("📂 Session file for %s not found, creating new session", session_id)
             return f"Session file not found for {session_id}"
+
+        onboarding_data, conversation, total, is_legacy = loaded
+
+        # Load into session-specific storage
+        session_data = _new_session_data(session_id)
+        session_data["onboarding_state"].update(onboarding_data)
+        session_data["_filled"] = _filled_mask(session_data["onboarding_state"])
+        session_data["conversation_log"] = conversation
+        session_data["_log_total"] = total
+        sessions_data[session_id] = session_data
+
+        if is_legacy:
+            # The log was already moved to JSONL; write the metadata file too
+            _mark_dirty(session_id)
+            await save_session(session_id)
+
+        logger.info("📂 Session %s loaded with %d messages", session_id, total)
+        return f"Session {session_id} loaded successfully"
     except Exception as e:
-        print(f"❌ Failed to load session {session_id}: {str(e)}")
+        logger.error("❌ Failed to load session %s: %s", session_id, e)
         return f"Failed to load session: {str(e)}"
 
 
-@function_tool()
 async def reset_session(session_id: str) -> str:
     """
     Reset the current onboarding state and conversation log for a new session.
+    Not exposed to the LLM; the host calls it when a call starts.
 
     Args:
         session_id: Unique identifier for the session.
@@ -151,72 +613,34 @@ async def reset_session(session_id: str) -> str:
     Returns:
         Confirmation message as string.
     """
-    # Reset session-specific data
-    sessions_data[session_id] = {
-        "onboarding_state": {
-            "name": None,
-            "email": None, 
-            "phone": None,
-            "country": None
-        },
-        "conversation_log": []
-    }
-    
     try:
+        # Let the writer finish with the old files and close them
+        await flush_session(session_id)
+
+        # Reset session-specific data and start the conversation log file over
+        session_data = _new_session_data(session_id)
+        session_data["_logfh"] = await asyncio.to_thread(open, session_data["_log_path"], "wb")
+        _closed_sessions.pop(session_id, None)
+        sessions_data[session_id] = session_data
+
+        # Rewrite the metadata
+        _mark_dirty(session_id)
         await save_session(session_id)
-        print(f"🔄 Session {session_id} reset successfully")
+        logger.info("🔄 Session %s reset successfully", session_id)
         return f"Session {session_id} reset successfully"
     except Exception as e:
-        print(f"❌ Failed to reset session {session_id}: {str(e)}")
+        logger.error("❌ Failed to reset session %s: %s", session_id, e)
         return f"Failed to reset session: {str(e)}"
 
 
-# -------------------
-#  Session Context Management
-# -------------------
-
-# Global variable to store current session ID for tool calls
-current_session_id: str = ""
-
-def set_current_session_id(session_id: str):
-    """Set the current session ID for tool calls"""
-    global current_session_id
-    current_session_id = session_id
-
 # -------------------
 #  Conversation Logging
 # -------------------
-@function_tool()
-async def log_message(speaker: str, text: str) -> str:
-    """
-    Log a message in the conversation history for the current session.
-
-    Args:
-        speaker: Either 'user' or 'assistant'.
-        text: Message text to log.
-
-    Returns:
-        Confirmation message as string.
-    """
-    session_id = current_session_id
-    try:
-        conversation_log = _get_conversation_log(session_id)
-        message_entry = {
-            "speaker": speaker,
-            "text": text,
-            "timestamp": str(__import__('datetime').datetime.now())
-        }
-        conversation_log.append(message_entry)
-        print(f"📝 [{session_id}] Logged {speaker} message: '{text[:50]}{'...' if len(text) > 50 else ''}'")
-        return f"Message logged successfully for session {session_id}"
-    except Exception as e:
-        print(f"❌ Failed to log message for session {session_id}: {str(e)}")
-        return f"Failed to log message: {str(e)}"
-
-@function_tool()
 async def log_message_with_session(session_id: str, speaker: str, text: str) -> str:
     """
-    Log a message in the conversation history for a specific session (direct call).
+    Log a message in the conversation history for a specific session.
+    Not exposed to the LLM; the host logs every message it adds to the
+    chat context.
 
     Args:
         session_id: Unique identifier for the session.
@@ -227,247 +651,178 @@ async def log_message_with_session(session_id: str, speaker: str, text: str) ->
         Confirmation message as string.
     """
     try:
-        conversation_log = _get_conversation_log(session_id)
-        message_entry = {
-            "speaker": speaker,
-            "text": text,
-            "timestamp": str(__import__('datetime').datetime.now())
-        }
-        conversation_log.append(message_entry)
-        print(f"📝 [{session_id}] Logged {speaker} message: '{text[:50]}{'...' if len(text) > 50 else ''}'")
+        session_data = _get_session_data(session_id)
+        message_entry = (speaker, text, time.time())
+        _append_to_log(session_data["conversation_log"], message_entry)
+        session_data["_log_total"] += 1
+        _queue_log_entry(session_id, message_entry)
+        logger.debug("📝 [%s] Logged %s message: '%.50s'", session_id, speaker, text)
         return f"Message logged successfully for session {session_id}"
     except Exception as e:
-        print(f"❌ Failed to log message for session {session_id}: {str(e)}")
+        logger.error("❌ Failed to log message for session %s: %s", session_id, e)
         return f"Failed to log message: {str(e)}"
 
 
 # -------------------
-#  Validation & Storage Functions (Updated for current session)
+#  Validation & Storage Functions
 # -------------------
-@function_tool()
-async def validate_field(field: str, value: str) -> str:
-    """
-    Validate a user-provided onboarding field using Pydantic.
 
-    Args:
-        field: One of "name", "email", "phone", "country".
-        value: The user's provided value to validate.
-
-    Returns:
-        Validation result as string.
-    """
-    session_id = current_session_id
-    print(f"🔧 [{session_id}] VALIDATE_FIELD CALLED: field='{field}', value='{value}'")
-    
-    onboarding_state = _get_onboarding_state(session_id)
-    
-    if field not in onboarding_state:
-        result = f"Invalid field: {field}. Must be one of: name, email, phone, country"
-        print(f"🔧 [{session_id}] VALIDATE_FIELD RESULT: {result}")
+# Each tool comes from a factory that binds it to one session up front, so
+# an agent passes its own copies to the LLM and no shared state is looked up
+# on each call.
+
+def make_validate_field(session_id: str):
+    """Build the validate_field tool, bound to the given session"""
+    @function_tool()
+    async def validate_field(field: str, value: str) -> str:
+        """
+        Validate a user-provided onboarding field using Pydantic.
+
+        Args:
+            field: One of "name", "email", "phone", "country".
+            value: The user's provided value to validate.
+
+        Returns:
+            Validation result as string.
+        """
+        logger.debug("🔧 [%s] VALIDATE_FIELD CALLED: field='%s', value='%s'", session_id, field, value)
+
+        if field not in _FIELD_ADAPTERS:
+            result = f"Invalid field: {field}. Must be one of: name, email, phone, country"
+            logger.debug("🔧 [%s] VALIDATE_FIELD RESULT: %s", session_id, result)
+            return result
+
+        try:
+            _FIELD_ADAPTERS[field].validate_python(value)
+            result = f"Valid {field}: {value}"
+            logger.debug("🔧 [%s] VALIDATE_FIELD RESULT: %s", session_id, result)
+            return result
+        except ValidationError as e:
+            result = f"Invalid {field}: {_format_validation_error(e)}"
+            logger.debug("🔧 [%s] VALIDATE_FIELD RESULT: %s", session_id, result)
+            return result
+
+    return validate_field
+
+
+def make_store_field(session_id: str):
+    """Build the store_field tool, bound to the given session"""
+    @function_tool()
+    async def store_field(field: str, value: str) -> str:
+        """
+        Store a validated onboarding field in the state.
+
+        Args:
+            field: One of "name", "email", "phone", "country".
+            value: The validated value to store.
+
+        Returns:
+            Confirmation message as string.
+        """
+        logger.debug("🔧 [%s] STORE_FIELD CALLED: field='%s', value='%s'", session_id, field, value)
+
+        onboarding_state = _get_onboarding_state(session_id)
+
+        if field not in onboarding_state:
+            result = f"Invalid field: {field}. Must be one of: name, email, phone, country"
+            logger.debug("🔧 [%s] STORE_FIELD RESULT: %s", session_id, result)
+            return result
+
+        # Validate before storing
+        try:
+            _FIELD_ADAPTERS[field].validate_python(value)
+        except ValidationError as e:
+            result = f"Cannot store invalid value: Invalid {field}: {_format_validation_error(e)}"
+            logger.debug("🔧 [%s] STORE_FIELD RESULT: %s", session_id, result)
+            return result
+
+        onboarding_state[field] = value
+        _get_session_data(session_id)["_filled"] |= FIELD_BITS[field]
+        _mark_dirty(session_id)
+        await save_session(session_id)
+        result = f"{field.capitalize()} stored successfully: {value}"
+        logger.debug("🔧 [%s] STORE_FIELD RESULT: %s", session_id, result)
         return result
-    
-    temp_data = onboarding_state.copy()
-    temp_data[field] = value
 
-    try:
-        UserOnboarding(**temp_data)
-        result = f"Valid {field}: {value}"
-        print(f"🔧 [{session_id}] VALIDATE_FIELD RESULT: {result}")
-        return result
-    except Exception as e:
-        result = f"Invalid {field}: {str(e)}"
-        print(f"🔧 [{session_id}] VALIDATE_FIELD RESULT: {result}")
-        return result
+    return store_field
 
-@function_tool()
-async def store_field(field: str, value: str) -> str:
-    """
-    Store a validated onboarding field in the state.
 
-    Args:
-        field: One of "name", "email", "phone", "country".
-        value: The validated value to store.
+def make_is_onboarding_complete(session_id: str):
+    """Build the is_onboarding_complete tool, bound to the given session"""
+    @function_tool()
+    async def is_onboarding_complete() -> str:
+        """
+        Check if all onboarding fields have been filled for the current session.
 
-    Returns:
-        Confirmation message as string.
-    """
-    session_id = current_session_id
-    print(f"🔧 [{session_id}] STORE_FIELD CALLED: field='{field}', value='{value}'")
-    
-    onboarding_state = _get_onboarding_state(session_id)
-    
-    if field not in onboarding_state:
-        result = f"Invalid field: {field}. Must be one of: name, email, phone, country"
-        print(f"🔧 [{session_id}] STORE_FIELD RESULT: {result}")
-        return result
-    
-    # Validate before storing
-    validation_result = await validate_field(field, value)
-    if not validation_result.startswith("Valid"):
-        result = f"Cannot store invalid value: {validation_result}"
-        print(f"🔧 [{session_id}] STORE_FIELD RESULT: {result}")
-        return result
-    
-    onboarding_state[field] = value
-    result = f"{field.capitalize()} stored successfully: {value}"
-    print(f"🔧 [{session_id}] STORE_FIELD RESULT: {result}")
-    return result
-
-
-@function_tool()
-async def is_onboarding_complete() -> str:
-    """
-    Check if all onboarding fields have been filled for the current session.
-
-    Returns:
-        Status message as string.
-    """
-    session_id = current_session_id
-    onboarding_state = _get_onboarding_state(session_id)
-    missing_fields = [k for k, v in onboarding_state.items() if not v]
-    if missing_fields:
+        Returns:
+            Status message as string.
+        """
+        filled = get_filled_mask(session_id)
+        if filled == ALL_FIELDS_FILLED:
+            return "Onboarding complete - all fields filled"
+        missing_fields = [k for k, bit in FIELD_BITS.items() if not filled & bit]
         return f"Onboarding incomplete. Missing: {', '.join(missing_fields)}"
-    else:
-        return "Onboarding complete - all fields filled"
 
+    return is_onboarding_complete
 
-@function_tool()
-async def get_summary() -> str:
-    """
-    Get a summary of all collected onboarding data for the current session.
 
-    Returns:
-        Summary of collected data as string.
-    """
-    session_id = current_session_id
-    onboarding_state = _get_onboarding_state(session_id)
-    filled_fields = {k: v for k, v in onboarding_state.items() if v}
-    if not filled_fields:
-        return "No onboarding data collected yet"
-    
-    summary_parts = [f"{k.capitalize()}: {v}" for k, v in filled_fields.items()]
-    return "Collected data: " + ", ".join(summary_parts)
+def make_get_summary(session_id: str):
+    """Build the get_summary tool, bound to the given session"""
+    @function_tool()
+    async def get_summary() -> str:
+        """
+        Get a summary of all collected onboarding data for the current session.
 
-@function_tool()
-async def get_current_state() -> str:
-    """
-    Get the current state of all onboarding fields for the current session.
+        Returns:
+            Summary of collected data as string.
+        """
+        session_data = _peek_session_data(session_id)
+        filled = session_data["_filled"] if session_data else 0
+        if not filled:
+            return "No onboarding data collected yet"
 
-    Returns:
-        Current state as string.
-    """
-    session_id = current_session_id
-    onboarding_state = _get_onboarding_state(session_id)
-    state_parts = []
-    for field, value in onboarding_state.items():
-        status = value if value else "not provided"
-        state_parts.append(f"{field.capitalize()}: {status}")
-    
-    return "Current onboarding state: " + ", ".join(state_parts)
+        onboarding_state = session_data["onboarding_state"]
+        summary_parts = [f"{k.capitalize()}: {onboarding_state[k]}" for k, bit in FIELD_BITS.items() if filled & bit]
+        return "Collected data: " + ", ".join(summary_parts)
 
-@function_tool()
-async def save_current_session() -> str:
-    """
-    Save the current session data.
+    return get_summary
 
-    Returns:
-        Confirmation message as string.
-    """
-    return await save_session(current_session_id)
 
-@function_tool()
-async def reset_current_session() -> str:
+async def get_conversation_history(session_id: str, full: bool = False) -> str:
     """
-    Reset the current session data.
-
-    Returns:
-        Confirmation message as string.
-    """
-    return await reset_session(current_session_id)
-
-@function_tool()
-async def log_conversation_turn(user_message: str, assistant_response: str) -> str:
-    """
-    Log both user message and assistant response in one function call.
-    This ensures the LLM can explicitly log conversation turns.
+    Get a session's conversation history for debugging. Not exposed to the
+    LLM; a helper for inspecting a live session by hand.
 
     Args:
-        user_message: The user's message
-        assistant_response: The assistant's response
-
-    Returns:
-        Confirmation message as string.
-    """
-    session_id = current_session_id
-    try:
-        conversation_log = _get_conversation_log(session_id)
-        
-        # Log user message
-        if user_message.strip():
-            user_entry = {
-                "speaker": "user",
-                "text": user_message.strip(),
-                "timestamp": str(__import__('datetime').datetime.now())
-            }
-            conversation_log.append(user_entry)
-            print(f"📝 [{session_id}] Logged user message: '{user_message[:50]}{'...' if len(user_message) > 50 else ''}'")
-        
-        # Log assistant response
-        if assistant_response.strip():
-            assistant_entry = {
-                "speaker": "assistant", 
-                "text": assistant_response.strip(),
-                "timestamp": str(__import__('datetime').datetime.now())
-            }
-            conversation_log.append(assistant_entry)
-            print(f"📝 [{session_id}] Logged assistant response: '{assistant_response[:50]}{'...' if len(assistant_response) > 50 else ''}'")
-        
-        # Auto-save after logging
-        await save_session(session_id)
-        
-        return f"Conversation turn logged successfully for session {session_id}"
-    except Exception as e:
-        print(f"❌ Failed to log conversation turn for session {session_id}: {str(e)}")
-        return f"Failed to log conversation turn: {str(e)}"
-
-@function_tool()
-async def force_save_session() -> str:
-    """
-    Force save the current session data immediately.
-
-    Returns:
-        Confirmation message as string.
-    """
-    session_id = current_session_id
-    try:
-        result = await save_session(session_id)
-        print(f"🔄 [{session_id}] Force saved session")
-        return f"Session {session_id} force saved successfully"
-    except Exception as e:
-        print(f"❌ Failed to force save session {session_id}: {str(e)}")
-        return f"Failed to force save session: {str(e)}"
-
-@function_tool()
-async def get_conversation_history() -> str:
-    """
-    Get the current conversation history for debugging.
+        session_id: Unique identifier for the session.
+        full: If true, read the whole conversation from the session's log
+            file. Otherwise only the most recent messages kept in memory.
 
     Returns:
         Conversation history as string.
     """
-    session_id = current_session_id
     try:
-        conversation_log = _get_conversation_log(session_id)
-        if not conversation_log:
+        session_data = _peek_session_data(session_id)
+        total = session_data["_log_total"] if session_data else 0
+        if not total:
             return "No conversation history yet"
-        
-        history_parts = []
-        for i, entry in enumerate(conversation_log):
-            speaker = entry.get("speaker", "unknown")
-            text = entry.get("text", "")
-            timestamp = entry.get("timestamp", "")
-            history_parts.append(f"{i+1}. [{speaker}] {text} (at {timestamp})")
-        
-        return f"Conversation history ({len(conversation_log)} messages):\n" + "\n".join(history_parts)
+
+        if full:
+            # Messages still waiting for the writer, or being written, are
+            # not in the file yet. Only the lines known to be written are
+            # read, so a batch that lands mid-read is not listed twice.
+            pending = list(session_data["_pending_log"])
+            written = total - len(pending)
+            history = await asyncio.to_thread(
+                lambda: _format_history(itertools.chain(
+                    itertools.islice(_stream_log_file(session_data["_log_path"]), written), pending
+                ))
+            )
+            return f"Conversation history ({total} messages):\n" + history
+
+        conversation_log = session_data["conversation_log"]
+        recent = len(conversation_log["text"])
+        history = _format_history(_iter_log(conversation_log), start=total - recent + 1)
+        return f"Conversation history (last {recent} of {total} messages):\n" + history
     except Exception as e:
-        return f"Failed to get conversation history: {str(e)}"
\ No newline at end of file
+        return f"Failed to get conversation history: {str(e)}"